@@ -0,0 +1,36 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def newline_aligned_ranges(filename, chunk_count):
+    size = os.path.getsize(filename)
+    boundaries = [0]
+    with open(filename, 'rb') as f:
+        for idx in range(1, chunk_count):
+            f.seek(max(size * idx // chunk_count - 1, boundaries[-1]))
+            f.readline()
+            if f.tell() > boundaries[-1]:
+                boundaries.append(f.tell())
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def sum_range(filename, start, end, line_function):
+    total = 0
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline().decode().strip()
+            if len(line) > 0:
+                total += line_function(line)
+    return total
+
+
+def sum_lines(filename, line_function, workers=None, chunks_per_worker=4):
+    workers = workers or os.cpu_count() or 1
+    ranges = newline_aligned_ranges(filename, workers * chunks_per_worker)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(sum_range, filename, start, end, line_function)
+                   for start, end in ranges]
+        return sum(future.result() for future in futures)
@@ -1,4 +1,8 @@
-import re
+import mmap
+import os
+from collections import deque
+
+from chunked import sum_lines
 
 
 def is_digit(c):
@@ -16,29 +20,52 @@ MAPPING = {'one': 1, 'two': 2, 'three': 3, 'four': 4,
            '5': 5, '6': 6, '7': 7, '8': 8, '9': 9}
 
 
-def index_safe(s, search, from_right):
-    try:
-        return s.rindex(search) if from_right else s.index(search)
-    except:
-        return -1
+class DigitAutomaton:
+    def __init__(self, patterns):
+        self.transitions = [{}]
+        self.fallbacks = [0]
+        self.outputs = [None]
+        for pattern, value in patterns.items():
+            state = 0
+            for c in pattern:
+                if c not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.fallbacks.append(0)
+                    self.outputs.append(None)
+                    self.transitions[state][c] = len(self.transitions) - 1
+                state = self.transitions[state][c]
+            self.outputs[state] = value
+
+        queue = deque(self.transitions[0].values())
+        while len(queue) > 0:
+            state = queue.popleft()
+            for c, next_state in self.transitions[state].items():
+                fallback = self.fallbacks[state]
+                while fallback and c not in self.transitions[fallback]:
+                    fallback = self.fallbacks[fallback]
+                self.fallbacks[next_state] = self.transitions[fallback].get(c, 0)
+                if self.outputs[next_state] is None:
+                    self.outputs[next_state] = self.outputs[self.fallbacks[next_state]]
+                queue.append(next_state)
+
+    def find_first(self, text):
+        state = 0
+        for c in text:
+            while state and c not in self.transitions[state]:
+                state = self.fallbacks[state]
+            state = self.transitions[state].get(c, 0)
+            if self.outputs[state] is not None:
+                return self.outputs[state]
+        return None
+
+
+FORWARD_AUTOMATON = DigitAutomaton(MAPPING)
+BACKWARD_AUTOMATON = DigitAutomaton(
+    {word[::-1]: value for word, value in MAPPING.items()})
 
 
 def digits2(line):
-    first_idx = float('inf')
-    first_digit = None
-    last_idx = float('-inf')
-    last_digit = None
-    for digit_word in MAPPING.keys():
-        first_digit_idx = index_safe(line, digit_word, False)
-        last_digit_idx = index_safe(line, digit_word, True)
-        if first_digit_idx >= 0 and first_digit_idx < first_idx:
-            first_idx = first_digit_idx
-            first_digit = MAPPING[digit_word]
-        if last_digit_idx >= 0 and last_digit_idx > last_idx:
-            last_idx = last_digit_idx
-            last_digit = MAPPING[digit_word]
-
-    return first_digit, last_digit
+    return FORWARD_AUTOMATON.find_first(line), BACKWARD_AUTOMATON.find_first(reversed(line))
 
 
 def all_nums(lines, digits_f):
@@ -50,11 +77,55 @@ def read_input(filename):
         return f.readlines()
 
 
-def part1(filename):
+NON_DIGIT_BYTES = bytes(
+    c for c in range(256) if not (ord('0') <= c <= ord('9')) and c != ord('\n'))
+
+
+def calibration_blocks(data, block_size):
+    start = 0
+    while start < len(data):
+        end = start + block_size
+        if end >= len(data):
+            end = len(data)
+        else:
+            newline = data.find(b'\n', end)
+            end = len(data) if newline < 0 else newline + 1
+        yield data[start:end]
+        start = end
+
+
+def bulk_calibration(filename, block_size=1 << 26):
+    total = 0
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for block in calibration_blocks(data, block_size):
+                for digits in block.translate(None, NON_DIGIT_BYTES).split(b'\n'):
+                    if digits:
+                        total += 10 * (digits[0] - ord('0')) + digits[-1] - ord('0')
+    return total
+
+
+def calibration1(line):
+    first, last = digits1(line)
+    return 10*first + last
+
+
+def calibration2(line):
+    first, last = digits2(line)
+    return 10*first + last
+
+
+def part1(filename, workers=1):
+    if workers != 1:
+        return sum_lines(filename, calibration1, workers)
     return all_nums(read_input(filename), digits1)
 
 
-def part2(filename):
+def part2(filename, workers=1):
+    if workers != 1:
+        return sum_lines(filename, calibration2, workers)
     return all_nums(read_input(filename), digits2)
 
 
@@ -1,140 +1,147 @@
-from collections import deque
+import mmap
+from itertools import combinations
 
+NORTH, EAST, SOUTH, WEST = 1, 2, 4, 8
+DIRECTIONS = (NORTH, EAST, SOUTH, WEST)
+OPPOSITE = {NORTH: SOUTH, EAST: WEST, SOUTH: NORTH, WEST: EAST}
 
-class Node:
-    def __init__(self, x, y, symbol):
-        self.x = x
-        self.y = y
-        self.symbol = symbol
-        self.neighbors = set()
-
-    def __repr__(self):
-        return f'Node({self.x}, {self.y}, {self.symbol})'
-
-    def __str__(self):
-        return self.symbol
-
-    def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
-
-    def __lt__(self, other):
-        return self._cmp(other) < 0
-
-    def __gt__(self, other):
-        return self._cmp(other) > 0
-
-    def __hash__(self):
-        return hash((self.x, self.y))
-
-    def _cmp(self, other):
-        if self.x == other.x:
-            return self.y - other.y
-        elif self.x > other.x:
-            return 1
-        else:
-            return -1
-
-    def connect(self, node):
-        self.neighbors.add(node)
-
-    def has_neighbor(self, node):
-        return node in self.neighbors
-
-
-def dot(x, y):
-    return Node(x, y, '.')
-
-
-def horizontal(x, y):
-    return Node(x, y, '-')
+PIPE_CONNECTIONS = {
+    '|': NORTH | SOUTH,
+    '-': EAST | WEST,
+    'L': NORTH | EAST,
+    'J': NORTH | WEST,
+    '7': SOUTH | WEST,
+    'F': SOUTH | EAST,
+}
 
-
-def vertical(x, y):
-    return Node(x, y, '|')
+CONNECTION_TABLE = bytes(
+    PIPE_CONNECTIONS.get(chr(c), 0) for c in range(256))
 
 
 class Graph:
-    def __init__(self, node_map, width, height, start):
-        self.node_map = node_map
+    def __init__(self, symbols, connections, width, height, start):
+        self.symbols = symbols
+        self.connections = connections
         self.width = width
         self.height = height
         self.start = start
+        self.offsets = {NORTH: -width, EAST: 1, SOUTH: width, WEST: -1}
+
+    def __repr__(self):
+        return f'Graph({self.width}, {self.height}, {self.coords(self.start)})'
 
     def __str__(self):
-        lines = []
+        return '\n'.join(row.decode() for row in self.rows())
+
+    def rows(self):
         for y in range(self.height):
-            line = []
-            for x in range(self.width):
-                line.append(self.node_map[(x, y)].symbol)
-            lines.append(line)
-        return '\n'.join(''.join(line) for line in lines)
-
-    def non_loop_neighbors(self, x, y):
-        for neighbor_x, neighbor_y in get_neighbor_coords(x, y, self.width, self.height):
-            neighbor = self.node_map[(neighbor_x, neighbor_y)]
-            if neighbor.symbol in ('.', 'I'):
-                yield neighbor
-
-
-def get_neighbor_coords(x, y, width, height):
-    if y > 0:
-        yield (x, y-1)
-    if x > 0:
-        yield (x-1, y)
-    if x < width - 1:
-        yield (x+1, y)
-    if y < height - 1:
-        yield (x, y+1)
-
-
-def get_raw_neighbors(node):
-    x, y = node.x, node.y
-    symbol = node.symbol
-    if symbol == '|':
-        return [(x, y-1), (x, y+1)]
-    elif symbol == '-':
-        return [(x-1, y), (x+1, y)]
-    elif symbol == 'L':
-        return [(x, y-1), (x+1, y)]
-    elif symbol == 'J':
-        return [(x, y-1), (x-1, y)]
-    elif symbol == '7':
-        return [(x-1, y), (x, y+1)]
-    elif symbol == 'F':
-        return [(x+1, y), (x, y+1)]
-    else:
-        return []
-
-
-def is_in_bounds(x, y, width, height):
-    return x >= 0 and x < width and y >= 0 and y < height
-
-
-def get_neighbors(node, width, height):
-    return [(x, y) for x, y in get_raw_neighbors(node) if is_in_bounds(x, y, width, height)]
+            yield self.symbols[y*self.width:(y+1)*self.width]
+
+    def coords(self, idx):
+        return idx % self.width, idx // self.width
+
+    def step(self, idx, direction):
+        x, y = self.coords(idx)
+        if direction == NORTH and y == 0:
+            return None
+        if direction == SOUTH and y == self.height - 1:
+            return None
+        if direction == WEST and x == 0:
+            return None
+        if direction == EAST and x == self.width - 1:
+            return None
+        return idx + self.offsets[direction]
+
+    def neighbors(self, idx):
+        connections = self.connections[idx]
+        for direction in DIRECTIONS:
+            if connections & direction:
+                yield idx + self.offsets[direction]
+
+
+def closes_loop(graph):
+    current = graph.start
+    came_from = None
+    for _ in range(graph.width * graph.height):
+        direction = next((d for d in DIRECTIONS
+                          if graph.connections[current] & d and d != came_from), None)
+        if direction is None:
+            return False
+        current += graph.offsets[direction]
+        if not graph.connections[current] & OPPOSITE[direction]:
+            return False
+        came_from = OPPOSITE[direction]
+        if current == graph.start:
+            return True
+    return False
+
+
+def get_start_connections(graph):
+    # pipes next to S may point at it without being part of the loop, so
+    # keep the pair of directions that actually leads back around to S
+    candidates = []
+    for direction in DIRECTIONS:
+        neighbor = graph.step(graph.start, direction)
+        if neighbor is not None and graph.connections[neighbor] & OPPOSITE[direction]:
+            candidates.append(direction)
+    for first, second in combinations(candidates, 2):
+        graph.connections[graph.start] = first | second
+        if closes_loop(graph):
+            return first | second
+    raise Exception(f'No loop through start {graph.coords(graph.start)}')
+
+
+def remove_outward_connections(graph):
+    last_row = (graph.height - 1) * graph.width
+    for x in range(graph.width):
+        graph.connections[x] &= ~NORTH
+        graph.connections[last_row + x] &= ~SOUTH
+    for y in range(graph.height):
+        graph.connections[y * graph.width] &= ~WEST
+        graph.connections[y * graph.width + graph.width - 1] &= ~EAST
 
 
-def parse(lines):
-    node_map = {}
-    for y, line in enumerate(lines):
-        for x, symbol in enumerate(line):
-            node_map[(x, y)] = Node(x, y, symbol)
+class MappedConnections:
+    def __init__(self, data, start):
+        self.data = data
+        self.start = start
+        self.start_connections = 0
+
+    def __getitem__(self, idx):
+        if idx == self.start:
+            return self.start_connections
+        if idx < 0 or idx >= len(self.data):
+            return 0
+        return CONNECTION_TABLE[self.data[idx]]
+
+    def __setitem__(self, idx, connections):
+        if idx != self.start:
+            raise Exception('Only the start connections of a mapped file can change')
+        self.start_connections = connections
+
+
+def map_graph(data):
+    # each line keeps its newline as an extra column with no connections,
+    # so nothing is copied and lookups past the edges read as empty tiles
+    stride = data.find(b'\n') + 1
+    if stride == 0:
+        stride = len(data) + 1
+    height = (len(data) + stride - 1) // stride
+    start = data.find(b'S')
+    graph = Graph(data, MappedConnections(data, start), stride, height, start)
+    graph.connections[start] = get_start_connections(graph)
+    return graph
+
 
+def parse(lines):
     height = len(lines)
     width = len(lines[0])
-    for y in range(height):
-        for x in range(width):
-            neighbors = get_neighbors(node_map[(x, y)], width, height)
-            for neighbor in neighbors:
-                node_map[(x, y)].connect(node_map[neighbor])
-
-    nodes = node_map.values()
-    start = next(node for node in nodes if node.symbol == 'S')
-    start_neighbors = [node for node in nodes if node.has_neighbor(start)]
-    for neighbor in start_neighbors:
-        start.connect(neighbor)
-
-    return Graph(node_map, width, height, start)
+    symbols = bytearray(''.join(lines), 'ascii')
+    connections = symbols.translate(CONNECTION_TABLE)
+    graph = Graph(symbols, connections, width, height, symbols.index(b'S'))
+    remove_outward_connections(graph)
+    graph.connections[graph.start] = get_start_connections(graph)
+    return graph
 
 
 def read_input(filename):
@@ -143,115 +150,161 @@ def read_input(filename):
 
 
 def bfs(graph):
-    queue = deque([graph.start])
-    distances = {graph.start: 0}
-    while len(queue) > 0:
-        current = queue.popleft()
-        for neighbor in current.neighbors:
-            if neighbor not in distances:
-                queue.append(neighbor)
-                distances[neighbor] = distances[current] + 1
-    return distances
-
-
-def bfs_dot(graph):
-    start = graph.node_map[(0, 0)]
-    queue = deque([start])
-    distances = {start: 0}
-    while len(queue) > 0:
-        current = queue.popleft()
-        for neighbor in graph.non_loop_neighbors(current.x, current.y):
-            if neighbor not in distances:
-                queue.append(neighbor)
-                distances[neighbor] = distances[current] + 1
-    return distances
+    loop = bytearray(graph.width * graph.height)
+    loop[graph.start] = 1
+    frontier = [graph.start]
+    distance = 0
+    while True:
+        next_frontier = []
+        for current in frontier:
+            for neighbor in graph.neighbors(current):
+                if not loop[neighbor]:
+                    loop[neighbor] = 1
+                    next_frontier.append(neighbor)
+        if len(next_frontier) == 0:
+            return loop, distance
+        frontier = next_frontier
+        distance += 1
+
+
+def walk_loop(graph):
+    current = graph.start
+    came_from = None
+    while True:
+        yield current
+        direction = next(d for d in DIRECTIONS
+                         if graph.connections[current] & d and d != came_from)
+        current += graph.offsets[direction]
+        came_from = OPPOSITE[direction]
+        if current == graph.start:
+            return
+
+
+def measure_loop(graph):
+    loop_length = 0
+    double_area = 0
+    first_x, first_y = graph.coords(graph.start)
+    prev_x, prev_y = first_x, first_y
+    for idx in walk_loop(graph):
+        x, y = graph.coords(idx)
+        double_area += prev_x * y - x * prev_y
+        prev_x, prev_y = x, y
+        loop_length += 1
+    double_area += prev_x * first_y - first_x * prev_y
+    # Pick's theorem: area = interior + boundary / 2 - 1
+    interior = (abs(double_area) - loop_length) // 2 + 1
+    return loop_length, interior
 
 
 def max_distance(graph):
-    distances = bfs(graph)
-    return max(distances.items(), key=lambda x: x[1])[1]
-
-
-def get_modified_graph(graph):
-    modified_node_map = {}
-    distances = bfs(graph)
-    for node in graph.node_map.values():
-        if node in distances:
-            modified_node_map[(node.x, node.y)] = node
-        else:
-            modified_node_map[(node.x, node.y)] = Node(node.x, node.y, 'I')
-    return Graph(modified_node_map, graph.width, graph.height, graph.start)
-
-
-def get_double_graph(graph):
-    doubled_node_map = {}
+    loop_length, _ = measure_loop(graph)
+    return loop_length // 2
+
+
+def fill_outside(graph, loop):
+    # every tile sits on an odd coordinate of a doubled grid with a one
+    # tile border, so the border is always outside and can seed the flood
+    doubled_width = graph.width * 2 + 1
+    doubled_height = graph.height * 2 + 1
+    blocked = bytearray(doubled_width * doubled_height)
+    for idx in range(graph.width * graph.height):
+        if loop[idx]:
+            x, y = graph.coords(idx)
+            doubled_idx = (y*2 + 1) * doubled_width + x*2 + 1
+            blocked[doubled_idx] = 1
+            if graph.connections[idx] & EAST:
+                blocked[doubled_idx + 1] = 1
+            if graph.connections[idx] & SOUTH:
+                blocked[doubled_idx + doubled_width] = 1
+
+    outside = 2
+    blocked[0] = outside
+    stack = [0]
+    while len(stack) > 0:
+        current = stack.pop()
+        x = current % doubled_width
+        for neighbor, valid in ((current - doubled_width, current >= doubled_width),
+                                (current + doubled_width, current < len(blocked) - doubled_width),
+                                (current - 1, x > 0),
+                                (current + 1, x < doubled_width - 1)):
+            if valid and blocked[neighbor] == 0:
+                blocked[neighbor] = outside
+                stack.append(neighbor)
+    return blocked, doubled_width
+
+
+def flood_enclosed_count(graph):
+    loop, _ = bfs(graph)
+    filled, doubled_width = fill_outside(graph, loop)
+    count = 0
     for y in range(graph.height):
-        for x in range(graph.width):
-            old_node = graph.node_map[(x, y)]
-            symbol = old_node.symbol
-            doubled_node_map[(x*2, y*2)] = Node(x, y, symbol)
-            doubled_node_map[(x*2 + 1, y*2 + 1)] = dot(x, y)
-            r = (x*2 + 1, y*2)
-            d = (x*2, y*2 + 1)
-            if symbol == '|':
-                doubled_node_map[r] = dot(*r)
-                doubled_node_map[d] = vertical(*d)
-            elif symbol == '-':
-                doubled_node_map[r] = horizontal(*r)
-                doubled_node_map[d] = dot(*d)
-            elif symbol == 'L':
-                doubled_node_map[r] = horizontal(*r)
-                doubled_node_map[d] = dot(*d)
-            elif symbol == 'J':
-                doubled_node_map[r] = dot(*r)
-                doubled_node_map[d] = dot(*d)
-            elif symbol == '7':
-                doubled_node_map[r] = dot(*r)
-                doubled_node_map[d] = vertical(*d)
-            elif symbol == 'F':
-                doubled_node_map[r] = horizontal(*r)
-                doubled_node_map[d] = vertical(*d)
-            elif symbol == 'S':
-                if graph.node_map[(x + 1, y)].symbol in ('-', 'J', '7'):
-                    doubled_node_map[r] = horizontal(*r)
-                else:
-                    doubled_node_map[r] = dot(*r)
-                if graph.node_map[(x, y + 1)].symbol in ('|', 'J', 'L'):
-                    doubled_node_map[d] = vertical(*d)
-                else:
-                    doubled_node_map[d] = dot(*d)
-            else:
-                doubled_node_map[r] = dot(*r)
-                doubled_node_map[d] = dot(*d)
-
-    new_start_x, new_start_y = graph.start.x * 2, graph.start.y * 2
-    new_width, new_height = graph.width * 2, graph.height * 2
-    new_start = doubled_node_map[(new_start_x, new_start_y)]
-    new_graph = Graph(doubled_node_map, new_width, new_height, new_start)
-    return parse(str(new_graph).split('\n'))
-
-
-def fill_outside(graph):
-    # assume that 0,0 is outside the loop
-    explored = bfs_dot(graph)
-    modified_node_map = {}
-    for node in graph.node_map.values():
-        if node in explored:
-            modified_node_map[(node.x, node.y)] = dot(node.x, node.y)
-        else:
-            modified_node_map[(node.x, node.y)] = node
-    return Graph(modified_node_map, graph.width, graph.height, graph.start)
-
-
-def count_enclosed(graph):
-    return sum(1 for node in graph.node_map.values() if node.symbol == 'I')
-
-
-def enclosed_count(graph):
-    modified_graph = get_modified_graph(graph)
-    double_graph = get_double_graph(modified_graph)
-    filled_graph = fill_outside(double_graph)
-    return count_enclosed(filled_graph)
+        row_start = (y*2 + 1) * doubled_width + 1
+        count += filled[row_start:row_start + graph.width*2:2].count(0)
+    return count
+
+
+def shoelace_enclosed_count(graph):
+    _, interior = measure_loop(graph)
+    return interior
+
+
+def loop_row_bits(graph):
+    stride = (graph.width + 7) // 8
+    bitmap = bytearray(stride * graph.height)
+    for idx in walk_loop(graph):
+        x, y = graph.coords(idx)
+        bitmap[y*stride + (x >> 3)] |= 1 << (x & 7)
+    return [int.from_bytes(bitmap[y*stride:(y+1)*stride], 'little')
+            for y in range(graph.height)]
+
+
+def count_enclosed_rows(rows, row_bits, start_connections):
+    # a ray going right crosses the loop once for every loop tile that
+    # connects north ('|', 'L', 'J'), so 'L7' counts once and 'LJ' twice;
+    # the tiles between two loop tiles are all enclosed or all outside
+    count = 0
+    for row, bits in zip(rows, row_bits):
+        mask = format(bits, 'b')[::-1]
+        inside = False
+        prev_x = -1
+        x = mask.find('1')
+        while x >= 0:
+            if inside:
+                count += x - prev_x - 1
+            symbol = row[x]
+            connections = start_connections if symbol == ord('S') else CONNECTION_TABLE[symbol]
+            if connections & NORTH:
+                inside = not inside
+            prev_x = x
+            x = mask.find('1', x + 1)
+    return count
+
+
+def scanline_enclosed_count(graph):
+    return count_enclosed_rows(
+        graph.rows(), loop_row_bits(graph), graph.connections[graph.start])
+
+
+def stream_enclosed_count(filename):
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            graph = map_graph(data)
+            row_bits = loop_row_bits(graph)
+            start_connections = graph.connections[graph.start]
+    with open(filename, 'rb') as f:
+        rows = (line.rstrip(b'\r\n') for line in f)
+        return count_enclosed_rows(rows, row_bits, start_connections)
+
+
+ENCLOSURE_METHODS = {
+    'shoelace': shoelace_enclosed_count,
+    'flood': flood_enclosed_count,
+    'scanline': scanline_enclosed_count,
+}
+
+
+def enclosed_count(graph, method='shoelace'):
+    return ENCLOSURE_METHODS[method](graph)
 
 
 def part1(filename):
@@ -1,3 +1,6 @@
+from array import array
+
+
 class Point:
     def __init__(self, n, x, y):
         self.n = n
@@ -9,26 +12,23 @@ class Point:
 
 
 class Graph:
-    def __init__(self, points, expanded_rows, expanded_columns, expansion_factor):
+    def __init__(self, points, expanded_rows, expanded_columns, expansion_factor, width, height):
         self.points = points
         self.expanded_rows = set(expanded_rows)
         self.expanded_columns = set(expanded_columns)
         self.expansion_factor = expansion_factor
+        self.rows_before = prefix_counts(self.expanded_rows, height)
+        self.columns_before = prefix_counts(self.expanded_columns, width)
 
-    def distance(self, point1, point2):
-        real1, real2 = self.get_real_point(point1), self.get_real_point(point2)
-        return manhattan_distance(real1, real2)
-
-    def get_real_point(self, point):
-        x_factor = sum(1 for x in self.expanded_columns if x < point.x)
-        y_factor = sum(1 for y in self.expanded_rows if y < point.y)
-        new_x = point.x + x_factor * (self.expansion_factor - 1)
-        new_y = point.y + y_factor * (self.expansion_factor - 1)
-        return Point(point.n, new_x, new_y)
 
-
-def manhattan_distance(point1, point2):
-    return abs(point1.x - point2.x) + abs(point1.y - point2.y)
+def prefix_counts(indices, size):
+    counts = array('I', [0]) * size
+    count = 0
+    for idx in range(size):
+        counts[idx] = count
+        if idx in indices:
+            count += 1
+    return counts
 
 
 def get_expansions(lines):
@@ -37,11 +37,14 @@ def get_expansions(lines):
         if '#' not in lines[idx]:
             expanded_rows.append(idx)
 
-    expanded_columns = []
-    for idx in range(len(lines[0])):
-        column = [line[idx] for line in lines]
-        if '#' not in column:
-            expanded_columns.append(idx)
+    occupied_columns = set()
+    for line in lines:
+        idx = line.find('#')
+        while idx >= 0:
+            occupied_columns.add(idx)
+            idx = line.find('#', idx + 1)
+    expanded_columns = [idx for idx in range(len(lines[0]))
+                        if idx not in occupied_columns]
 
     return expanded_rows, expanded_columns
 
@@ -53,7 +56,8 @@ def parse(lines, expansion_factor):
             if line[x] == '#':
                 points.append(Point(len(points) + 1, x, y))
     expanded_rows, expanded_columns = get_expansions(lines)
-    return Graph(points, expanded_rows, expanded_columns, expansion_factor)
+    return Graph(points, expanded_rows, expanded_columns, expansion_factor,
+                 len(lines[0]), len(lines))
 
 
 def read_input(filename):
@@ -61,15 +65,37 @@ def read_input(filename):
         return list(map(lambda s: s.strip(), f.readlines()))
 
 
-def all_pairs(graph):
-    for point1 in graph.points:
-        for point2 in graph.points:
-            if point1.n < point2.n:
-                yield (point1, point2)
+def sum_pairwise_gaps(values):
+    total = 0
+    prefix = 0
+    for idx, value in enumerate(sorted(values)):
+        total += value * idx - prefix
+        prefix += value
+    return total
+
+
+class DistanceSums:
+    def __init__(self, base_distance, gap_crossings):
+        self.base_distance = base_distance
+        self.gap_crossings = gap_crossings
+
+    def __repr__(self):
+        return f'DistanceSums({self.base_distance}, {self.gap_crossings})'
+
+    def total_distance(self, expansion_factor):
+        return self.base_distance + (expansion_factor - 1) * self.gap_crossings
+
+
+def precompute_distances(graph):
+    base_distance = (sum_pairwise_gaps(point.x for point in graph.points) +
+                     sum_pairwise_gaps(point.y for point in graph.points))
+    gap_crossings = (sum_pairwise_gaps(graph.columns_before[point.x] for point in graph.points) +
+                     sum_pairwise_gaps(graph.rows_before[point.y] for point in graph.points))
+    return DistanceSums(base_distance, gap_crossings)
 
 
 def all_distances(graph):
-    return sum(graph.distance(point1, point2) for point1, point2 in all_pairs(graph))
+    return precompute_distances(graph).total_distance(graph.expansion_factor)
 
 
 def part1(filename):
@@ -1,43 +1,24 @@
-import itertools as it
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from progress import no_progress
 
 
 class Row:
-    def __init__(self, springs, spring_runs, non_empty_runs, run_counts):
+    def __init__(self, springs, run_counts):
         self.springs = springs
-        self.spring_runs = spring_runs
-        self.non_empty_runs = non_empty_runs
         self.run_counts = run_counts
 
 
-def group_by_run(line, mapper=None):
-    current = None
-    start_idx = None
-    count = 0
-    for idx, c in enumerate(line):
-        c = mapper(c) if mapper else c
-        if c == current:
-            count += 1
-        else:
-            if current is not None:
-                yield (current, count)
-            current = c
-            start_idx = idx
-            count = 1
-    yield (start_idx, current, count)
-
-
 def parse(lines, unfold=False):
     results = []
-    non_empty_mapper = {'.': '.', '?': '#', '#': '#'}
     for line in lines:
         springs, specs = line.split(' ')
         if unfold:
             springs = '?'.join(springs for _ in range(5))
             specs = ','.join(specs for _ in range(5))
         run_counts = tuple(map(int, specs.split(',')))
-        runs = list(group_by_run(springs))
-        non_empty_runs = list(group_by_run(springs, mapper=non_empty_mapper))
-        results.append(Row(springs, runs, non_empty_runs, run_counts))
+        results.append(Row(springs, run_counts))
     return results
 
 
@@ -46,53 +27,74 @@ def read_input(filename):
         return list(map(lambda s: s.strip(), f.readlines()))
 
 
-def is_match(runs, run_counts):
-    grouped = list(group_by_run(runs))
-    spring_counts = tuple([value for _, key, value in grouped if key == '#'])
-    return spring_counts == run_counts
-
+def count_arrangements(springs, run_counts):
+    # states map (group index, current run length) to the number of ways
+    # to reach them; a trailing '.' closes any run still open at the end
+    states = {(0, 0): 1}
+    for spring in springs + '.':
+        next_states = {}
+        for (group_idx, run_length), count in states.items():
+            if spring in '#?' and group_idx < len(run_counts) and run_length < run_counts[group_idx]:
+                key = (group_idx, run_length + 1)
+                next_states[key] = next_states.get(key, 0) + count
+            if spring in '.?':
+                if run_length == 0:
+                    key = (group_idx, 0)
+                elif run_length == run_counts[group_idx]:
+                    key = (group_idx + 1, 0)
+                else:
+                    continue
+                next_states[key] = next_states.get(key, 0) + count
+        states = next_states
+    return states.get((len(run_counts), 0), 0)
+
+
+def count_all_solutions(rows, progress=no_progress):
+    total = 0
+    for idx, row in enumerate(rows):
+        progress('row', idx=idx, total=total)
+        total += count_arrangements(row.springs, row.run_counts)
+    return total
 
-def apply_combination(row, combination):
-    l = [c for c in row.springs]
-    for c in combination:
-        l[c] = '#'
-    return l
 
+def estimated_cost(row):
+    return (row.springs.count('?') + 1) * len(row.run_counts)
 
-def remove_impossible(row):
-    springs = [c for c in row.springs]
-    first_group_length = row.run_counts[0]
-    first_known_run = next(run for run in row.non_empty_runs if run[0] == '#')
 
+def count_chunk(chunk):
+    return sum(count_arrangements(springs, run_counts) for springs, run_counts in chunk)
 
-def find_plausible_combinations(row):
-    springs = remove_impossible(row)
-    unknown_indices = [idx for idx,
-                       value in enumerate(springs) if value == '?']
-    known_count = sum(1 for value in row.springs if value == '#')
-    target_count = sum(row.run_counts)
-    unknown_count = target_count - known_count
-    combos = list(it.combinations(unknown_indices, unknown_count))
-    return combos
 
+def cost_balanced_chunks(rows, chunk_count):
+    # rows costlier than a chunk's share end up alone in their own chunk,
+    # cheaper rows are packed together until they reach that share
+    rows = sorted(rows, key=estimated_cost, reverse=True)
+    target_cost = sum(map(estimated_cost, rows)) / chunk_count
+    chunks = []
+    chunk = []
+    chunk_cost = 0
+    for row in rows:
+        chunk.append((row.springs, row.run_counts))
+        chunk_cost += estimated_cost(row)
+        if chunk_cost >= target_cost:
+            chunks.append(chunk)
+            chunk = []
+            chunk_cost = 0
+    if len(chunk) > 0:
+        chunks.append(chunk)
+    return chunks
 
-def find_solutions(row, unfold=False):
-    combos = find_plausible_combinations(row)
-    if unfold:
-        print(f'combination count: {len(combos)}')
-    for combination in combos:
-        new_row = apply_combination(row, combination)
-        if is_match(new_row, row.run_counts):
-            yield combination
 
+def count_all_solutions_parallel(rows, workers=None, chunks_per_worker=8, progress=no_progress):
+    chunk_count = (workers or os.cpu_count() or 1) * chunks_per_worker
+    chunks = cost_balanced_chunks(rows, chunk_count)
 
-def count_all_solutions(rows, unfold=False):
     total = 0
-    for idx, row in enumerate(rows):
-        if unfold:
-            print(f'Starting row {idx} (total={total})')
-        for solution in find_solutions(row, unfold=unfold):
-            total += 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(count_chunk, chunk) for chunk in chunks]
+        for done, future in enumerate(as_completed(futures)):
+            total += future.result()
+            progress('chunk', done=done + 1, chunks=len(chunks), total=total)
     return total
 
 
@@ -101,11 +103,13 @@ def part1(filename):
     return count_all_solutions(rows)
 
 
-def part2(filename):
+def part2(filename, workers=1, progress=no_progress):
     rows = parse(read_input(filename), unfold=True)
-    return count_all_solutions(rows, unfold=True)
+    if workers == 1:
+        return count_all_solutions(rows, progress=progress)
+    return count_all_solutions_parallel(rows, workers=workers, progress=progress)
 
 
 if __name__ == '__main__':
     print(part1('day12.txt'))
-    print(part2('day12_example.txt'))
+    print(part2('day12.txt'))
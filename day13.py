@@ -1,3 +1,6 @@
+from progress import no_progress
+
+
 def parse(lines):
     blocks = []
     current = []
@@ -16,111 +19,53 @@ def read_input(filename):
         return list(map(lambda s: s.strip(), f.readlines()))
 
 
-def find_vertical_reflection(block):
-    width = len(block[0])
-    for idx in range(width - 1):
-        left, right = None, None
-        search = 0
-        while left == right and idx - search >= 0 and idx + 1 + search < width:
-            left = tuple(line[idx-search] for line in block)
-            right = tuple(line[idx+1+search] for line in block)
-            if left != right:
-                break
-            search += 1
-        else:
-            return idx + 1
-    return None
+def encode_block(block):
+    rows = [0] * len(block)
+    columns = [0] * len(block[0])
+    for y, line in enumerate(block):
+        for x, c in enumerate(line):
+            if c == '#':
+                rows[y] |= 1 << x
+                columns[x] |= 1 << y
+    return rows, columns
 
 
-def find_horizontal_reflection(block):
-    height = len(block)
-    for idx in range(height - 1):
-        top, bottom = None, None
-        search = 0
-        while top == bottom and idx - search >= 0 and idx + 1 + search < height:
-            top = tuple(block[idx-search])
-            bottom = tuple(block[idx+1+search])
-            if top != bottom:
+def find_reflection(lines, smudges=0):
+    for idx in range(1, len(lines)):
+        mismatches = 0
+        for before, after in zip(reversed(lines[:idx]), lines[idx:]):
+            mismatches += (before ^ after).bit_count()
+            if mismatches > smudges:
                 break
-            search += 1
-        else:
-            return idx + 1
+        if mismatches == smudges:
+            return idx
     return None
 
 
-def count_all_reflection_indices(blocks):
-    total = 0
-    for block in blocks:
-        vertical_idx = find_vertical_reflection(block)
-        if vertical_idx is None:
-            horizontal_idx = find_horizontal_reflection(block)
-            if horizontal_idx is None:
-                raise Exception('No reflection found for block {block}')
-            else:
-                total += 100 * horizontal_idx
-        else:
-            total += vertical_idx
-    return total
-
-
-def smudge(block, x, y):
-    old = block[y][x]
-    block[y][x] = '.' if block[y][x] == '#' else '#'
-    print(f'smudged ({x}, {y}) from {old} to {block[y][x]}')
-
-
-def get_ranges(block):
-    width, height = len(block[0]), len(block)
-    baseline = find_vertical_reflection(block)
-    if baseline is not None:
-        x_range = range(width)
-        midpoint = width // 2
-        if baseline > midpoint:
-            return (x_range, range(baseline - midpoint, width))
-        else:
-            return (x_range, range(baseline + midpoint))
+def reflection_index(block, smudges=0):
+    rows, columns = encode_block(block)
+    vertical_idx = find_reflection(columns, smudges)
+    if vertical_idx is not None:
+        return vertical_idx
+    horizontal_idx = find_reflection(rows, smudges)
+    if horizontal_idx is None:
+        raise Exception(f'No reflection found for block {block}')
+    return 100 * horizontal_idx
 
-    baseline = find_horizontal_reflection(block)
-    y_range = range(height)
-    midpoint = height // 2
-    if baseline > midpoint:
-        return (range(baseline - midpoint, height), y_range)
-    else:
-        return (range(baseline + midpoint), y_range)
 
-
-def count_all_smudged_reflection_indices(blocks):
+def count_all_reflection_indices(blocks, smudges=0, progress=no_progress):
     total = 0
     for idx, block in enumerate(blocks):
-        x_range, y_range = get_ranges(block)
-        print(f'ranges: {list(x_range)}, {list(y_range)}')
-        for y in y_range:
-            found = False
-            for x in x_range:
-                smudge(block, x, y)
-                for line in block:
-                    print(''.join(line))
-                print()
-                horizontal_idx = find_horizontal_reflection(block)
-                if horizontal_idx is None:
-                    vertical_idx = find_vertical_reflection(block)
-                    if vertical_idx is None:
-                        smudge(block, x, y)
-                    else:
-                        print(f'block {idx}: vertical {vertical_idx}')
-                        total += vertical_idx
-                        found = True
-                        break
-                else:
-                    print(f'block {idx}: horizontal {horizontal_idx}')
-                    total += 100 * horizontal_idx
-                    found = True
-                    break
-            if found:
-                break
+        block_index = reflection_index(block, smudges)
+        progress('block', idx=idx, index=block_index, total=total)
+        total += block_index
     return total
 
 
+def count_all_smudged_reflection_indices(blocks, progress=no_progress):
+    return count_all_reflection_indices(blocks, smudges=1, progress=progress)
+
+
 def part1(filename):
     rows = parse(read_input(filename))
     return count_all_reflection_indices(rows)
@@ -133,4 +78,4 @@ def part2(filename):
 
 if __name__ == '__main__':
     print(part1('day13.txt'))
-    print(part2('day13_example.txt'))
+    print(part2('day13.txt'))
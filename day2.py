@@ -1,25 +1,26 @@
 import math
+from array import array
+from bisect import bisect_right
 
+from chunked import sum_lines
 
-def parse_round(s):
-    colors = []
-    for color_desc in s.split(', '):
-        number, color = color_desc.split(' ')
-        colors.append((int(number), color.strip()))
-    return colors
+
+COLORS = ('red', 'green', 'blue')
+
+LIMITS = {'red': 12, 'green': 13, 'blue': 14}
 
 
 def parse_game(line):
     game_num_text, game_desc = line.split(': ')
     _, game_num_desc = game_num_text.split(' ')
-    game_num = int(game_num_desc)
-    round_descs = game_desc.split('; ')
-    rounds = list(map(parse_round, round_descs))
-    return (game_num, rounds)
-
-
-def parse(lines):
-    return list(map(parse_game, lines))
+    max_by_color = dict.fromkeys(COLORS, 0)
+    for color_desc in game_desc.replace(';', ',').split(', '):
+        number, color = color_desc.split(' ')
+        color = color.strip()
+        amount = int(number)
+        if amount > max_by_color[color]:
+            max_by_color[color] = amount
+    return int(game_num_desc), max_by_color
 
 
 def read_input(filename):
@@ -27,49 +28,157 @@ def read_input(filename):
         return f.readlines()
 
 
-LIMITS = {'red': 12, 'green': 13, 'blue': 14}
-
-
-def check_colors(game):
-    for round in game:
-        for amount, color in round:
-            if amount > LIMITS[color]:
-                return False
-    return True
-
-
-def find_valid_games(games):
-    valid_game_nums = []
-    for game_num, game in games:
-        if check_colors(game):
-            valid_game_nums.append(game_num)
-    return sum(valid_game_nums)
-
-
-def find_game_minimums(game):
-    max_by_color = {'red': 0, 'green': 0, 'blue': 0}
-    for round in game:
-        for amount, color in round:
-            if amount > max_by_color[color]:
-                max_by_color[color] = amount
-    return max_by_color
-
-
-def find_total_power(games):
-    total = 0
-    for _, game in games:
-        max_by_color = find_game_minimums(game)
-        color_prod = math.prod(max_by_color.values())
-        total += color_prod
-    return total
-
-
-def part1(filename):
-    return find_valid_games(parse(read_input(filename)))
-
-
-def part2(filename):
-    return find_total_power(parse(read_input(filename)))
+def within_limits(max_by_color, limits=LIMITS):
+    return all(max_by_color[color] <= limit for color, limit in limits.items())
+
+
+class GameStore:
+    def __init__(self):
+        self.game_nums = array('I')
+        self.maxima = {color: array('I') for color in COLORS}
+
+    def __repr__(self):
+        return f'GameStore({len(self.game_nums)} games)'
+
+    def __len__(self):
+        return len(self.game_nums)
+
+    def add(self, line):
+        game_num, max_by_color = parse_game(line)
+        self.game_nums.append(game_num)
+        for color in COLORS:
+            self.maxima[color].append(max_by_color[color])
+
+    def color_columns(self, colors=COLORS):
+        return [self.maxima[color] for color in colors]
+
+    def valid_game_sum(self, limits=LIMITS):
+        colors = list(limits.keys())
+        color_limits = [limits[color] for color in colors]
+        total = 0
+        for game_num, *amounts in zip(self.game_nums, *self.color_columns(colors)):
+            if all(amount <= limit for amount, limit in zip(amounts, color_limits)):
+                total += game_num
+        return total
+
+    def total_power(self):
+        return sum(map(math.prod, zip(*self.color_columns())))
+
+
+class LimitIndex:
+    # The dense index is a prefix-sum cube of game numbers with one cell per
+    # combination of distinct red, green and blue maxima. Building it costs
+    # O(cells) and every query is then a bisect per color plus one lookup,
+    # which pays off whenever more than a handful of queries are asked.
+    # When the cube would have more than CELLS_PER_GAME cells per game it
+    # is skipped. The games are then kept sorted by red instead, which
+    # costs O(n log n) to build. A query bisects to the games under the red
+    # limit and makes one pass over their green and blue columns.
+    CELLS_PER_GAME = 4
+
+    def __init__(self, store):
+        self.values = {color: sorted(set(store.maxima[color])) for color in COLORS}
+        cells = math.prod(len(values) for values in self.values.values())
+        self.dense = cells <= self.CELLS_PER_GAME * max(len(store), 1)
+        if self.dense:
+            self.build_cube(store, cells)
+        else:
+            self.build_sorted(store)
+
+    def __repr__(self):
+        if self.dense:
+            return f'LimitIndex({len(self.sums)} cells)'
+        return f'LimitIndex({len(self.game_nums)} sorted games)'
+
+    def build_cube(self, store, cells):
+        self.strides = {}
+        size = 1
+        for color in reversed(COLORS):
+            self.strides[color] = size
+            size *= len(self.values[color])
+
+        self.sums = array('Q', [0]) * cells
+        for game_num, *amounts in zip(store.game_nums, *store.color_columns()):
+            flat_idx = 0
+            for color, amount in zip(COLORS, amounts):
+                idx = bisect_right(self.values[color], amount) - 1
+                flat_idx += idx * self.strides[color]
+            self.sums[flat_idx] += game_num
+        for color in COLORS:
+            stride, length = self.strides[color], len(self.values[color])
+            for flat_idx in range(cells):
+                if (flat_idx // stride) % length > 0:
+                    self.sums[flat_idx] += self.sums[flat_idx - stride]
+
+    def build_sorted(self, store):
+        sort_color, *other_colors = COLORS
+        sort_column = store.maxima[sort_color]
+        order = sorted(range(len(store)), key=sort_column.__getitem__)
+        self.sort_color = sort_color
+        self.sorted_maxima = array('I', map(sort_column.__getitem__, order))
+        self.game_nums = array('I', map(store.game_nums.__getitem__, order))
+        self.other_maxima = {color: array('I', map(store.maxima[color].__getitem__, order))
+                             for color in other_colors}
+
+    def valid_game_sum(self, limits=LIMITS):
+        if self.dense:
+            return self.cube_sum(limits)
+        return self.sorted_sum(limits)
+
+    def cube_sum(self, limits):
+        flat_idx = 0
+        for color in COLORS:
+            if color in limits:
+                idx = bisect_right(self.values[color], limits[color]) - 1
+            else:
+                idx = len(self.values[color]) - 1
+            if idx < 0:
+                return 0
+            flat_idx += idx * self.strides[color]
+        return self.sums[flat_idx]
+
+    def sorted_sum(self, limits):
+        if self.sort_color in limits:
+            end = bisect_right(self.sorted_maxima, limits[self.sort_color])
+        else:
+            end = len(self.sorted_maxima)
+        colors = [color for color in self.other_maxima if color in limits]
+        color_limits = [limits[color] for color in colors]
+        columns = [self.other_maxima[color][:end] for color in colors]
+        total = 0
+        for game_num, *amounts in zip(self.game_nums[:end], *columns):
+            if all(amount <= limit for amount, limit in zip(amounts, color_limits)):
+                total += game_num
+        return total
+
+
+def parse_store(lines):
+    store = GameStore()
+    for line in lines:
+        store.add(line)
+    return store
+
+
+def valid_game_number(line):
+    game_num, max_by_color = parse_game(line)
+    return game_num if within_limits(max_by_color) else 0
+
+
+def game_power(line):
+    _, max_by_color = parse_game(line)
+    return math.prod(max_by_color.values())
+
+
+def part1(filename, workers=1):
+    if workers != 1:
+        return sum_lines(filename, valid_game_number, workers)
+    return parse_store(read_input(filename)).valid_game_sum()
+
+
+def part2(filename, workers=1):
+    if workers != 1:
+        return sum_lines(filename, game_power, workers)
+    return parse_store(read_input(filename)).total_power()
 
 
 if __name__ == '__main__':
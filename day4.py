@@ -1,5 +1,7 @@
 import math
 
+from chunked import sum_lines
+
 
 def parse(lines):
     cards = []
@@ -25,6 +27,10 @@ def count_winners(cards):
         yield 0 if matches == 0 else int(math.pow(2, matches - 1))
 
 
+def card_points(line):
+    return next(count_winners(parse([line])))
+
+
 def count_copies(cards):
     copy_count = {}
     for idx, card in enumerate(cards):
@@ -40,7 +46,9 @@ def count_copies(cards):
     return sum(copy_count.values())
 
 
-def part1(filename):
+def part1(filename, workers=1):
+    if workers != 1:
+        return sum_lines(filename, card_points, workers)
     return sum(count_winners(parse(read_input(filename))))
 
 
@@ -1,3 +1,7 @@
+from array import array
+from bisect import bisect_right
+
+
 class Range:
     def __init__(self, destination, source, amount):
         self.destination = destination
@@ -14,6 +18,21 @@ class Range:
         else:
             return None
 
+    def split_interval(self, start, length):
+        end = start + length
+        overlap_start = max(start, self.source)
+        overlap_end = min(end, self.source + self.amount)
+        if overlap_start >= overlap_end:
+            return None, [(start, length)]
+
+        mapped = (overlap_start + self._diff, overlap_end - overlap_start)
+        unmapped = []
+        if start < overlap_start:
+            unmapped.append((start, overlap_start - start))
+        if overlap_end < end:
+            unmapped.append((overlap_end, end - overlap_end))
+        return mapped, unmapped
+
 
 class Category:
     def __init__(self, source_type, destination_type, ranges):
@@ -31,6 +50,74 @@ class Category:
                 return range_mapping
         return n
 
+    def map_intervals(self, intervals):
+        mapped = []
+        pending = list(intervals)
+        for range in self.ranges:
+            unmapped = []
+            for start, length in pending:
+                mapped_interval, rest = range.split_interval(start, length)
+                if mapped_interval is not None:
+                    mapped.append(mapped_interval)
+                unmapped.extend(rest)
+            pending = unmapped
+        return mapped + pending
+
+
+class PiecewiseMap:
+    def __init__(self, starts, offsets):
+        self.starts = starts
+        self.offsets = offsets
+
+    def __repr__(self):
+        return f'PiecewiseMap({self.starts}, {self.offsets})'
+
+    @staticmethod
+    def identity():
+        return PiecewiseMap([0], [0])
+
+    @staticmethod
+    def from_category(category):
+        boundaries = {0}
+        for range in category.ranges:
+            boundaries.add(range.source)
+            boundaries.add(range.source + range.amount)
+        starts = sorted(boundaries)
+        offsets = [category.map_number(start) - start for start in starts]
+        return PiecewiseMap(starts, offsets).simplified()
+
+    def segment_index(self, n):
+        return bisect_right(self.starts, n) - 1
+
+    def map_number(self, n):
+        return n + self.offsets[self.segment_index(n)]
+
+    def then(self, other):
+        starts = []
+        offsets = []
+        for idx, (start, offset) in enumerate(zip(self.starts, self.offsets)):
+            end = self.starts[idx + 1] if idx + 1 < len(self.starts) else None
+            other_idx = other.segment_index(start + offset)
+            while True:
+                starts.append(max(start, other.starts[other_idx] - offset))
+                offsets.append(offset + other.offsets[other_idx])
+                other_idx += 1
+                if other_idx >= len(other.starts):
+                    break
+                if end is not None and other.starts[other_idx] - offset >= end:
+                    break
+        return PiecewiseMap(starts, offsets).simplified()
+
+    def simplified(self):
+        starts = []
+        offsets = []
+        for start, offset in zip(self.starts, self.offsets):
+            if len(offsets) > 0 and offsets[-1] == offset:
+                continue
+            starts.append(start)
+            offsets.append(offset)
+        return PiecewiseMap(starts, offsets)
+
 
 def parse_range(lines, idx):
     line = lines[idx]
@@ -71,50 +158,39 @@ def read_input(filename):
         return list(map(lambda s: s.strip(), f.readlines()))
 
 
+def category_chain(categories):
+    by_source = {category.source_type: category for category in categories}
+    current_category = 'seed'
+    while current_category != 'location':
+        category = by_source[current_category]
+        yield category
+        current_category = category.destination_type
+
+
+def compile_categories(categories):
+    compiled = PiecewiseMap.identity()
+    for category in category_chain(categories):
+        compiled = compiled.then(PiecewiseMap.from_category(category))
+    return compiled
+
+
+def map_seed_batch(seeds, compiled):
+    return array('q', map(compiled.map_number, seeds))
+
+
+def lowest_location(seeds, compiled):
+    return min(map(compiled.map_number, seeds), default=float('inf'))
+
+
 def move_through_categories(seeds, categories):
-    lowest = float('inf')
-    for seed in seeds:
-        n = seed
-        current_category = 'seed'
-        while current_category != 'location':
-            category = next(
-                c for c in categories if c.source_type == current_category)
-            current_category = category.destination_type
-            n = category.map_number(n)
-        if n < lowest:
-            lowest = n
-    return lowest
-
-
-def find_range_inflection_points(seed_range, categories):
-    prev_n = None
-    prev_result = None
-    step = 1000
-    for n in range(seed_range[0], seed_range[0] + seed_range[1], step):
-        n_result = move_through_categories([n], categories)
-        if prev_n is not None and n_result - prev_result != step:
-            prev_n_ = None
-            prev_result_ = None
-            for n_ in range(prev_n, n + 1):
-                n_result_ = move_through_categories([n_], categories)
-                if prev_n_ is not None and n_result_ - prev_result_ != 1:
-                    yield (n_-1, n_)
-                prev_n_ = n_
-                prev_result_ = n_result_
-        prev_n = n
-        prev_result = n_result
-
-
-def get_best_seed_from_inflection_points(seed_ranges, categories):
-    all_results = []
-    for seed_range in seed_ranges:
-        for low_point, high_point in find_range_inflection_points(seed_range, categories):
-            low_result = move_through_categories([low_point], categories)
-            high_result = move_through_categories([high_point], categories)
-            all_results.append(low_result)
-            all_results.append(high_result)
-
-    return min(all_results)
+    return lowest_location(seeds, compile_categories(categories))
+
+
+def move_intervals_through_categories(seed_ranges, categories):
+    intervals = list(seed_ranges)
+    for category in category_chain(categories):
+        intervals = category.map_intervals(intervals)
+    return min(start for start, _ in intervals)
 
 
 def part1(filename):
@@ -125,7 +201,7 @@ def part1(filename):
 def part2(filename):
     seed_ranges, categories = parse(read_input(filename))
     seed_ranges = list(zip(seed_ranges[::2], seed_ranges[1::2]))
-    return get_best_seed_from_inflection_points(seed_ranges, categories)
+    return move_intervals_through_categories(seed_ranges, categories)
 
 
 if __name__ == '__main__':
@@ -7,30 +7,31 @@ PUZZLE_INPUT_TIME_2 = [61709066]
 PUZZLE_INPUT_DISTANCE_2 = [643118413621041]
 
 
-def race(idx, hold_time, input_times):
-    race_time = input_times[idx]
-    return (race_time - hold_time) * hold_time
+def wins(hold_time, race_time, record_distance):
+    return (race_time - hold_time) * hold_time > record_distance
 
 
-def beats_record(idx, hold_time, input_times, input_distances):
-    record_distance = input_distances[idx]
-    return race(idx, hold_time, input_times) > record_distance
+def count_hold_times(race_time, record_distance):
+    best_hold_time = race_time // 2
+    if best_hold_time < 1 or not wins(best_hold_time, race_time, record_distance):
+        return 0
 
+    discriminant = race_time * race_time - 4 * record_distance
+    lowest = max((race_time - math.isqrt(discriminant)) // 2, 1)
+    while lowest > 1 and wins(lowest - 1, race_time, record_distance):
+        lowest -= 1
+    while not wins(lowest, race_time, record_distance):
+        lowest += 1
+    return race_time - 2 * lowest + 1
 
-def all_hold_times(idx, input_times, input_distances):
-    record_hold_times = []
-    for hold_time in range(1, input_times[idx]):
-        if beats_record(idx, hold_time, input_times, input_distances):
-            record_hold_times.append(hold_time)
-    return record_hold_times
+
+def count_all_races(races):
+    for race_time, record_distance in races:
+        yield count_hold_times(race_time, record_distance)
 
 
 def all_races(input_times, input_distances):
-    record_times = []
-    for idx in range(len(input_times)):
-        record_times.append(
-            len(all_hold_times(idx, input_times, input_distances)))
-    return math.prod(record_times)
+    return math.prod(count_all_races(zip(input_times, input_distances)))
 
 
 def part1():
@@ -1,6 +1,7 @@
+import os
+from array import array
 from enum import Enum
-from operator import __lt__, __gt__, __ge__, __le__
-from itertools import combinations_with_replacement
+from itertools import combinations_with_replacement, product
 
 
 class OrderedEnum(Enum):
@@ -69,14 +70,30 @@ JOKER_CARD_VALUE_MAPPING = {
 
 NON_JOKER_CARDS = [card for card in CARD_VALUE_MAPPING.keys() if card != 'J']
 
+CARDS = list(CARD_VALUE_MAPPING.keys())
+CARD_INDEX = {card: idx for idx, card in enumerate(CARDS)}
+HAND_SIZE = 5
+
+
+def get_value_mapping(use_jokers):
+    return JOKER_CARD_VALUE_MAPPING if use_jokers else CARD_VALUE_MAPPING
+
+
+def pack_sort_key(rank, cards, value_mapping):
+    key = rank.value
+    for card in cards:
+        key = (key << 4) | value_mapping[card]
+    return key
+
 
 class Hand:
-    def __init__(self, cards, bid, use_jokers):
+    def __init__(self, cards, bid, use_jokers, rank_table=None):
         self.cards = cards
         self.bid = bid
         self.use_jokers = use_jokers
+        self.rank_table = check_rank_table(rank_table, use_jokers)
         self._rank = None
-        self._card_values = []
+        self._sort_key = None
 
     def __repr__(self):
         return f'Hand("{"".join(self.cards)}", {self.bid})'
@@ -85,41 +102,30 @@ class Hand:
         return self.cards == other.cards
 
     def __lt__(self, other):
-        return self._op(other, __lt__, False)
+        return self.sort_key < other.sort_key
 
     def __gt__(self, other):
-        return self._op(other, __gt__, False)
+        return self.sort_key > other.sort_key
 
     def __le__(self, other):
-        return self._op(other, __le__, True)
+        return self.sort_key <= other.sort_key
 
     def __ge__(self, other):
-        return self._op(other, __ge__, True)
-
-    def card_value(self, idx):
-        if len(self._card_values) <= idx:
-            value_mapping = JOKER_CARD_VALUE_MAPPING if self.use_jokers else CARD_VALUE_MAPPING
-            self._card_values.append(value_mapping[self.cards[idx]])
-        return self._card_values[idx]
-
-    def _op(self, other, op, true_if_equal):
-        my_rank = self.rank
-        other_rank = other.rank
-        if my_rank != other_rank:
-            return op(my_rank, other_rank)
-
-        for card_idx in range(len(self.cards)):
-            my_card = self.card_value(card_idx)
-            other_card = other.card_value(card_idx)
-            if my_card != other_card:
-                return op(my_card, other_card)
+        return self.sort_key >= other.sort_key
 
-        return true_if_equal
+    @property
+    def sort_key(self):
+        if self._sort_key is None:
+            self._sort_key = pack_sort_key(
+                self.rank, self.cards, get_value_mapping(self.use_jokers))
+        return self._sort_key
 
     @property
     def rank(self):
         if self._rank is None:
-            if self.use_jokers:
+            if self.rank_table is not None:
+                self._rank = self.rank_table.lookup(self.cards)
+            elif self.use_jokers:
                 self._rank = Hand.calculate_rank_with_jokers(self.cards)
             else:
                 self._rank = Hand.calculate_rank(self.cards)
@@ -242,28 +248,136 @@ class Hand:
             return Rank.HIGH_CARD
 
 
-def parse(lines, use_jokers):
+class RankTable:
+    def __init__(self, use_jokers, ranks):
+        self.use_jokers = use_jokers
+        self.ranks = ranks
+
+    def __repr__(self):
+        return f'RankTable({self.use_jokers}, {len(self.ranks)} entries)'
+
+    @staticmethod
+    def encode(cards):
+        idx = 0
+        for card in cards:
+            idx = idx * len(CARDS) + CARD_INDEX[card]
+        return idx
+
+    def lookup(self, cards):
+        return Rank(self.ranks[RankTable.encode(cards)])
+
+    @staticmethod
+    def build(use_jokers):
+        calculate = Hand.calculate_rank_with_jokers if use_jokers else Hand.calculate_rank
+        hands = product(CARDS, repeat=HAND_SIZE)
+        return RankTable(use_jokers, array('B', (calculate(cards).value for cards in hands)))
+
+    @staticmethod
+    def file_header(use_jokers):
+        return b'day7 ranks jokers\n' if use_jokers else b'day7 ranks plain\n'
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(RankTable.file_header(self.use_jokers))
+            self.ranks.tofile(f)
+
+    @staticmethod
+    def is_cache_file(use_jokers, filename):
+        try:
+            RankTable.load(use_jokers, filename)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    @staticmethod
+    def load(use_jokers, filename):
+        header = RankTable.file_header(use_jokers)
+        with open(filename, 'rb') as f:
+            if f.read(len(header)) != header:
+                raise ValueError(f'{filename} is not a rank table for use_jokers={use_jokers}')
+            data = f.read()
+        if len(data) != len(CARDS) ** HAND_SIZE:
+            raise ValueError(f'{filename} has {len(data)} ranks, expected {len(CARDS) ** HAND_SIZE}')
+        return RankTable(use_jokers, array('B', data))
+
+
+RANK_TABLES = {}
+
+
+def check_rank_table(rank_table, use_jokers):
+    if rank_table is not None and rank_table.use_jokers != use_jokers:
+        raise ValueError(
+            f'Rank table for use_jokers={rank_table.use_jokers} used with use_jokers={use_jokers}')
+    return rank_table
+
+
+def get_rank_table(use_jokers, cache_filename=None):
+    key = (use_jokers, cache_filename)
+    if key not in RANK_TABLES:
+        table = None
+        if cache_filename is not None and os.path.exists(cache_filename):
+            try:
+                table = RankTable.load(use_jokers, cache_filename)
+            except (OSError, ValueError):
+                table = None
+            if table is None and RankTable.is_cache_file(not use_jokers, cache_filename):
+                raise ValueError(
+                    f'{cache_filename} holds the rank table for use_jokers={not use_jokers}')
+        if table is None:
+            same_rules = [cached for (cached_jokers, _), cached in RANK_TABLES.items()
+                          if cached_jokers == use_jokers]
+            table = same_rules[0] if same_rules else RankTable.build(use_jokers)
+            if cache_filename is not None:
+                table.save(cache_filename)
+        RANK_TABLES[key] = table
+    return RANK_TABLES[key]
+
+
+def parse(lines, use_jokers, rank_table=None):
     hands = []
     for line in lines:
         hand, bid = line.split(' ')
         cards = [c for c in hand]
-        hands.append(Hand(cards, int(bid), use_jokers))
+        hands.append(Hand(cards, int(bid), use_jokers, rank_table))
     return hands
 
 
+def parse_columns(lines, use_jokers, rank_table=None):
+    value_mapping = get_value_mapping(use_jokers)
+    if check_rank_table(rank_table, use_jokers) is not None:
+        calculate = rank_table.lookup
+    elif use_jokers:
+        calculate = Hand.calculate_rank_with_jokers
+    else:
+        calculate = Hand.calculate_rank
+
+    keys = array('Q')
+    bids = array('Q')
+    for line in lines:
+        hand, bid = line.split(' ')
+        keys.append(pack_sort_key(calculate(hand), hand, value_mapping))
+        bids.append(int(bid))
+    return keys, bids
+
+
 def read_input(filename):
     with open(filename, 'r') as f:
         return list(map(lambda s: s.strip(), f.readlines()))
 
 
 def rank_hands(hands):
-    hands.sort()
+    hands.sort(key=lambda hand: hand.sort_key)
     total = 0
     for idx, hand in enumerate(hands):
         total += hand.bid * (idx + 1)
     return total
 
 
+def rank_columns(keys, bids):
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return sum(bids[idx] * (position + 1) for position, idx in enumerate(order))
+
+
 def part1(filename):
     return rank_hands(parse(read_input(filename), use_jokers=False))
 
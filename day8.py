@@ -1,5 +1,7 @@
 import math
 import re
+from array import array
+from itertools import product
 
 MAPPING_RE = re.compile(r'(\w+) = \((\w+)\, (\w+)\)')
 
@@ -18,40 +20,157 @@ def read_input(filename):
         return list(map(lambda s: s.strip(), f.readlines()))
 
 
-def traverse(instructions, mappings):
-    current = mappings['AAA']
-    history = []
-    destination = None
-    while destination != 'ZZZ':
-        for instruction in instructions:
-            destination = current[0] if instruction == 'L' else current[1]
-            history.append((instruction, destination))
-            current = mappings[destination]
-            if destination == 'ZZZ':
+class GhostCycle:
+    def __init__(self, tail_length, cycle_length, tail_hits, cycle_hits):
+        self.tail_length = tail_length
+        self.cycle_length = cycle_length
+        self.tail_hits = tail_hits
+        self.cycle_hits = cycle_hits
+
+    def __repr__(self):
+        return f'GhostCycle({self.tail_length}, {self.cycle_length}, {sorted(self.tail_hits)}, {sorted(self.cycle_hits)})'
+
+    def is_hit(self, step):
+        if step <= self.tail_length:
+            return step in self.tail_hits
+        return step % self.cycle_length in self.cycle_hits
+
+    def hits_until(self, last_step):
+        hits = [step for step in self.tail_hits if step <= last_step]
+        for residue in self.cycle_hits:
+            step = first_step_after(residue, self.cycle_length, self.tail_length)
+            hits.extend(range(step, last_step + 1, self.cycle_length))
+        return sorted(hits)
+
+
+class CompiledGraph:
+    def __init__(self, instructions, names, left, right):
+        self.instructions = instructions
+        self.names = names
+        self.index = {name: idx for idx, name in enumerate(names)}
+        self.left = left
+        self.right = right
+
+    def __repr__(self):
+        return f'CompiledGraph({self.instructions}, {len(self.names)} nodes)'
+
+    @staticmethod
+    def compile(instructions, mappings):
+        names = list(mappings.keys())
+        index = {name: idx for idx, name in enumerate(names)}
+        left = array('I', (index[mappings[name][0]] for name in names))
+        right = array('I', (index[mappings[name][1]] for name in names))
+        return CompiledGraph(instructions, names, left, right)
+
+    def end_mask(self, is_end):
+        return bytearray(1 if is_end(name) else 0 for name in self.names)
+
+    def jump_table(self, ends):
+        jumps = array('I')
+        first_ends = array('i')
+        for node in range(len(self.names)):
+            first_end = -1
+            for count, instruction in enumerate(self.instructions):
+                node = self.left[node] if instruction == 'L' else self.right[node]
+                if first_end < 0 and ends[node]:
+                    first_end = count + 1
+            jumps.append(node)
+            first_ends.append(first_end)
+        return jumps, first_ends
+
+    def steps_to_end(self, node, ends, jump_table=None):
+        jumps, first_ends = jump_table or self.jump_table(ends)
+        count = 0
+        for _ in range(len(self.names)):
+            if first_ends[node] >= 0:
+                return count + first_ends[node]
+            node = jumps[node]
+            count += len(self.instructions)
+        raise Exception(f'No end reachable from {self.names[node]}')
+
+    def end_offsets(self, node, ends):
+        offsets = []
+        for count, instruction in enumerate(self.instructions):
+            node = self.left[node] if instruction == 'L' else self.right[node]
+            if ends[node]:
+                offsets.append(count + 1)
+        return offsets
+
+    def find_cycle(self, node, ends, jumps):
+        seen = {}
+        passes = []
+        while node not in seen:
+            seen[node] = len(passes)
+            passes.append(node)
+            node = jumps[node]
+
+        period = len(self.instructions)
+        cycle_start = seen[node]
+        tail_hits = set()
+        cycle_hits = set()
+        cycle_length = (len(passes) - cycle_start) * period
+        for pass_idx, pass_node in enumerate(passes):
+            for offset in self.end_offsets(pass_node, ends):
+                step = pass_idx * period + offset
+                if pass_idx < cycle_start:
+                    tail_hits.add(step)
+                else:
+                    cycle_hits.add(step % cycle_length)
+        return GhostCycle(cycle_start * period, cycle_length, tail_hits, cycle_hits)
+
+
+def first_step_after(residue, modulus, last_step):
+    return last_step + 1 + (residue - last_step - 1) % modulus
+
+
+def combine_congruences(first, second):
+    residue1, modulus1 = first
+    residue2, modulus2 = second
+    divisor = math.gcd(modulus1, modulus2)
+    if (residue2 - residue1) % divisor != 0:
+        return None
+    reduced2 = modulus2 // divisor
+    k = (residue2 - residue1) // divisor * pow(modulus1 // divisor, -1, reduced2) % reduced2
+    modulus = modulus1 * reduced2
+    return (residue1 + k * modulus1) % modulus, modulus
+
+
+def earliest_common_step(cycles):
+    tail_end = max(cycle.tail_length for cycle in cycles)
+    for step in cycles[0].hits_until(tail_end):
+        if all(cycle.is_hit(step) for cycle in cycles):
+            return step
+
+    earliest = None
+    choices = [[(residue, cycle.cycle_length) for residue in cycle.cycle_hits]
+               for cycle in cycles]
+    for congruences in product(*choices):
+        combined = congruences[0]
+        for congruence in congruences[1:]:
+            combined = combine_congruences(combined, congruence)
+            if combined is None:
                 break
-    return len(history)
+        else:
+            step = first_step_after(*combined, tail_end)
+            if earliest is None or step < earliest:
+                earliest = step
+    if earliest is None:
+        raise Exception('Ghosts never reach their ends at the same time')
+    return earliest
+
+
+def traverse(instructions, mappings):
+    graph = CompiledGraph.compile(instructions, mappings)
+    ends = graph.end_mask(lambda name: name == 'ZZZ')
+    return graph.steps_to_end(graph.index['AAA'], ends)
 
 
 def traverse_multi(instructions, mappings):
-    current_keys = list(filter(lambda key: key.endswith('A'), mappings.keys()))
-    count = 0
-    at_end_by_idx = [None for _ in current_keys]
-    while not all(current.endswith('Z') for current in current_keys):
-        for instruction in instructions:
-            new_current_keys = []
-            for idx, current_key in enumerate(current_keys):
-                current = mappings[current_key]
-                destination = current[0] if instruction == 'L' else current[1]
-                new_current_keys.append(destination)
-                if destination.endswith('Z'):
-                    if at_end_by_idx[idx] is None:
-                        at_end_by_idx[idx] = count + 1
-                if all(x is not None for x in at_end_by_idx):
-                    return math.lcm(*at_end_by_idx)
-            count += 1
-            current_keys = new_current_keys
-
-    return count
+    graph = CompiledGraph.compile(instructions, mappings)
+    ends = graph.end_mask(lambda name: name.endswith('Z'))
+    jumps, _ = graph.jump_table(ends)
+    starts = [idx for idx, name in enumerate(graph.names) if name.endswith('A')]
+    return earliest_common_step([graph.find_cycle(start, ends, jumps) for start in starts])
 
 
 def part1(filename):
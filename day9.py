@@ -1,3 +1,9 @@
+import math
+from functools import cache
+from operator import mul
+
+from chunked import sum_lines
+
 
 def parse(lines):
     return [[int(n) for n in line.split(' ')] for line in lines]
@@ -8,35 +14,68 @@ def read_input(filename):
         return list(map(lambda s: s.strip(), f.readlines()))
 
 
-def diffs(line):
-    return [b - a for a, b in zip(line, line[1:])]
+@cache
+def coefficients(length):
+    previous_coefficients = tuple(
+        (-1) ** idx * math.comb(length, idx + 1) for idx in range(length))
+    next_coefficients = tuple(
+        (-1) ** (length - 1 - idx) * math.comb(length, idx) for idx in range(length))
+    return previous_coefficients, next_coefficients
+
+
+def dot(coefficients, line):
+    return sum(map(mul, coefficients, line))
+
+
+def extrapolate_both(line):
+    previous_coefficients, next_coefficients = coefficients(len(line))
+    return dot(previous_coefficients, line), dot(next_coefficients, line)
 
 
 def extrapolate(line):
-    levels = [line]
-    while len(line) > 0 and not all(n == 0 for n in line):
-        line = diffs(line)
-        levels.append(line)
+    _, next_coefficients = coefficients(len(line))
+    return dot(next_coefficients, line)
+
+
+def all_extrapolations(lines):
+    column_sums_by_length = {}
+    for line in lines:
+        column_sums = column_sums_by_length.setdefault(len(line), [0] * len(line))
+        column_sums[:] = map(sum, zip(column_sums, line))
+
+    previous_total, next_total = 0, 0
+    for column_sums in column_sums_by_length.values():
+        previous_value, next_value = extrapolate_both(column_sums)
+        previous_total += previous_value
+        next_total += next_value
+    return previous_total, next_total
+
+
+def next_value(line):
+    return extrapolate(parse([line])[0])
 
-    levels[-1].append(0)
-    for prev_level, next_level in reversed(list(zip(levels[1:], levels))):
-        next_level.append(prev_level[-1] + next_level[-1])
 
-    return levels[0][-1]
+def previous_value(line):
+    value, _ = extrapolate_both(parse([line])[0])
+    return value
 
 
 def all_diffs(lines):
-    return sum(extrapolate(line) for line in lines)
+    _, next_total = all_extrapolations(lines)
+    return next_total
 
 
-def part1(filename):
+def part1(filename, workers=1):
+    if workers != 1:
+        return sum_lines(filename, next_value, workers)
     return all_diffs(parse(read_input(filename)))
 
 
-def part2(filename):
-    lines = parse(read_input(filename))
-    lines = [list(reversed(line)) for line in lines]
-    return all_diffs(lines)
+def part2(filename, workers=1):
+    if workers != 1:
+        return sum_lines(filename, previous_value, workers)
+    previous_total, _ = all_extrapolations(parse(read_input(filename)))
+    return previous_total
 
 
 if __name__ == '__main__':
@@ -0,0 +1,20 @@
+import time
+
+
+def no_progress(event, **details):
+    pass
+
+
+class ConsoleReporter:
+    def __init__(self, interval=1.0, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self._last_report = None
+
+    def __call__(self, event, **details):
+        now = self.clock()
+        if self._last_report is not None and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        detail_text = ', '.join(f'{key}={value}' for key, value in details.items())
+        print(f'{event}: {detail_text}')